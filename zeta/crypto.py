@@ -1,7 +1,7 @@
 import os
 import hashlib
 
-from riemann.utils import sha256, hash256  # noqa: F401
+from riemann.utils import sha256  # noqa: F401
 
 import ecdsa
 from ecdsa.ecdsa import int_to_string
@@ -16,6 +16,18 @@ DB_PBKDF_SALT = b'summa-zeta-key-stretching'
 PBKDF_ITERATIONS = 100000
 
 
+def hash256(data: Union[bytes, memoryview]) -> bytes:
+    '''
+    Bitcoin's double-sha256. Goes straight to hashlib's OpenSSL backend
+    riemann's hash256 checks the selected network on every call
+    Args:
+        data       (bytes): the data to hash
+    Returns:
+        (bytes): the 32-byte digest
+    '''
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
 def pbkdf2_hmac(data: bytes,
                 salt: bytes = b'',
                 hash_name: str = 'sha512',
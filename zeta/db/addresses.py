@@ -75,31 +75,30 @@ def store_address(address: Union[str, AddressEntry]) -> bool:
     if not validate_address(a):
         return False
 
-    c = connection.get_cursor()
-    try:
-        c.execute(
-            '''
-            INSERT OR REPLACE INTO addresses VALUES (
-                :address,
-                :script)
-            ''',
-            a)
-
-        # NB: we track what pubkeys show up in what scripts so we can search
-        for pubkey in a['script_pubkeys']:
+    with connection.write_cursor() as c:
+        try:
             c.execute(
                 '''
-                INSERT OR REPLACE INTO pubkey_to_script VALUES (
-                    :pubkey,
+                INSERT OR REPLACE INTO addresses VALUES (
+                    :address,
                     :script)
                 ''',
-                {'pubkey': pubkey, 'script': a['script']})
-        connection.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        c.close()
+                a)
+
+            # NB: track what pubkeys show up in what scripts so we can search
+            for pubkey in a['script_pubkeys']:
+                c.execute(
+                    '''
+                    INSERT OR REPLACE INTO pubkey_to_script VALUES (
+                        :pubkey,
+                        :script)
+                    ''',
+                    {'pubkey': pubkey, 'script': a['script']})
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            return False
 
 
 def find_associated_pubkeys(script: bytes) -> List[str]:
@@ -107,8 +106,7 @@ def find_associated_pubkeys(script: bytes) -> List[str]:
     looks up pubkeys associated with a script
     somewhat redundant with pubkeys_from_script
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = c.execute(
             '''
             SELECT pubkey FROM pubkey_to_script
@@ -116,16 +114,13 @@ def find_associated_pubkeys(script: bytes) -> List[str]:
             ''',
             {'script': script})
         return [r['pubkey'] for r in res]
-    finally:
-        c.close()
 
 
 def find_by_address(address: str) -> Optional[AddressEntry]:
     '''
     Finds an AddressEntry for the address if it exists, returns None otherwise
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = c.execute(
             '''
             SELECT * from addresses
@@ -137,16 +132,13 @@ def find_by_address(address: str) -> Optional[AddressEntry]:
             # we know there can only be one
             return address_from_row(a)
         return None
-    finally:
-        c.close()
 
 
 def find_by_script(script: bytes) -> List[AddressEntry]:
     '''
     Finds all AddressEntries with the corresponding Script
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [address_from_row(r) for r in c.execute(
             '''
             SELECT * FROM addresses
@@ -154,16 +146,13 @@ def find_by_script(script: bytes) -> List[AddressEntry]:
             ''',
             {'script': script})]
         return res
-    finally:
-        c.close()
 
 
 def find_by_pubkey(pubkey: str) -> List[AddressEntry]:
     '''
     Finds all AddressEntries whose script includes the specified pubkey
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [address_from_row(r) for r in c.execute(
             '''
             SELECT * FROM addresses
@@ -173,20 +162,15 @@ def find_by_pubkey(pubkey: str) -> List[AddressEntry]:
             ''',
             {'pubkey': pubkey})]
         return res
-    finally:
-        c.close()
 
 
 def find_all_addresses() -> List[str]:
     '''
     Finds all addresses that we're tracking
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         return [r['address'] for r in c.execute(
             '''
             SELECT address FROM addresses
             '''
         )]
-    finally:
-        c.close()
@@ -1,8 +1,11 @@
 import os
 import sys
+import queue
 import sqlite3
+import threading
 
-from typing import Optional
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # TODO: Clean all this up and make better
 
@@ -27,7 +30,60 @@ DB_NAME: str
 CHAIN_NAME: str
 
 DB_PATH: str
+
+# NB: CONN is the single write connection. Reads on hot paths go through a
+#     FIFO pool of reader connections, which WAL lets run alongside writes
 CONN: sqlite3.Connection
+WRITE_LOCK = threading.Lock()
+NUM_READERS = 4
+_READERS: 'Optional[queue.Queue[sqlite3.Connection]]' = None
+
+# NB: rather than opening and closing a cursor per write, we keep one for
+#     the write connection. Only whoever holds WRITE_LOCK uses it
+_CURSORS: Dict[Tuple[int, bool], sqlite3.Cursor] = {}
+
+# NB: page_size only applies to a new db, and only before it switches to WAL
+#     foreign_keys stays off. pubkey_to_script references addresses(script),
+#     which can't be unique since every plain address has an empty script.
+#     enforcing it would fail every write with "foreign key mismatch"
+PRAGMAS: List[str] = [
+    'PRAGMA page_size=8192',
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-64000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA wal_autocheckpoint=10000',
+    'PRAGMA busy_timeout=5000']
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    '''
+    Opens a connection to the db and applies our pragmas
+    '''
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def close_conn() -> None:
+    '''
+    Closes the write connection and the reader pool, if they're open
+    '''
+    global _READERS
+
+    if _READERS is not None:
+        while not _READERS.empty():
+            _READERS.get().close()
+        _READERS = None
+    if 'CONN' in globals():
+        CONN.close()
+    _CURSORS.clear()
+
+    # NB: cached headers belong to the db we just closed
+    from zeta.db import headers
+    headers.clear_cache()
 
 
 def init_conn(
@@ -39,6 +95,9 @@ def init_conn(
     global CHAIN_NAME
     global DB_PATH
     global CONN
+    global _READERS
+
+    close_conn()
 
     if path:
         PATH = path
@@ -57,20 +116,98 @@ def init_conn(
     DB_PATH = os.path.join(PATH, '{}_{}.db'.format(DB_NAME, CHAIN_NAME))
     ensure_directory(PATH)
 
-    CONN = sqlite3.connect(DB_PATH)
-    CONN.row_factory = sqlite3.Row
+    CONN = _connect(DB_PATH)
 
-    # make sure the tables exist
+    # make sure the tables exist before readers look at them
     ensure_directory(PATH)
     ensure_tables()
 
+    readers: 'queue.Queue[sqlite3.Connection]' = queue.Queue()
+    for _ in range(NUM_READERS):
+        readers.put(_connect(DB_PATH))
+    _READERS = readers
+
 
 def commit():
     return CONN.commit()
 
 
-def get_cursor() -> sqlite3.Cursor:
-    return CONN.cursor()
+def rollback():
+    return CONN.rollback()
+
+
+def get_write_cursor() -> sqlite3.Cursor:
+    '''
+    Gets a cursor on the write connection. Its rows can be read by name
+    '''
+    c = CONN.cursor()
+    c.row_factory = sqlite3.Row
+    return c
+
+
+def acquire_reader() -> sqlite3.Connection:
+    '''
+    Takes a reader connection from the pool. Blocks until one is free
+    Falls back to the write connection if no pool has been set up
+    That one is shared, so the write lock is held until it's given back
+    Returns:
+        (sqlite3.Connection): a connection. Give it back with release_reader
+    '''
+    if _READERS is None:
+        WRITE_LOCK.acquire()
+        return CONN
+    return _READERS.get()
+
+
+def release_reader(conn: sqlite3.Connection) -> None:
+    '''
+    Returns a reader connection to the pool
+    '''
+    if conn is CONN:
+        WRITE_LOCK.release()
+    elif _READERS is not None:
+        _READERS.put(conn)
+
+
+def _cursor(conn: sqlite3.Connection, named: bool) -> sqlite3.Cursor:
+    '''
+    Gets the cursor we keep for a connection, making it if needed
+    '''
+    key = (id(conn), named)
+    c = _CURSORS.get(key)
+    if c is None or c.connection is not conn:
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row if named else None
+        _CURSORS[key] = c
+    return c
+
+
+@contextmanager
+def read_cursor(named: bool = False) -> Iterator[sqlite3.Cursor]:
+    '''
+    Checks out a reader connection and yields its cursor
+    Rows are tuples, or can be read by name if named is set
+    '''
+    conn = acquire_reader()
+    c = conn.cursor()
+    c.row_factory = sqlite3.Row if named else None
+    try:
+        yield c
+    finally:
+        # NB: closing resets a half-read statement. Left open, it keeps a
+        #     read transaction open and stops the WAL from checkpointing
+        c.close()
+        release_reader(conn)
+
+
+@contextmanager
+def write_cursor() -> Iterator[sqlite3.Cursor]:
+    '''
+    Takes the write lock and yields the write connection's cursor
+    Rows can be read by name
+    '''
+    with WRITE_LOCK:
+        yield _cursor(CONN, True)
 
 
 def ensure_tables() -> bool:
@@ -79,7 +216,7 @@ def ensure_tables() -> bool:
     Returns:
         (bool): true if table exists/was created, false if there's an exception
     '''
-    c = get_cursor()
+    c = get_write_cursor()
     try:
         c.execute('''
             CREATE TABLE IF NOT EXISTS headers(
@@ -95,6 +232,14 @@ def ensure_tables() -> bool:
                 height INTEGER,
                 accumulated_work INTEGER)
             ''')
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS headers_height_idx
+            ON headers(height)
+            ''')
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS headers_work_idx
+            ON headers(accumulated_work DESC)
+            ''')
         c.execute('''
             CREATE TABLE IF NOT EXISTS addresses(
                 address TEXT PRIMARY KEY,
@@ -126,6 +271,14 @@ def ensure_tables() -> bool:
                 address TEXT,
                 FOREIGN KEY(address) REFERENCES addresses(address))
             ''')  # default -2 for not yet spent. electrum uses -1 for mempool
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS addresses_script_idx
+            ON addresses(script)
+            ''')
+        c.execute('''
+            CREATE INDEX IF NOT EXISTS prevouts_address_idx
+            ON prevouts(address)
+            ''')
 
         commit()
         return True
@@ -136,7 +289,7 @@ def ensure_tables() -> bool:
 
 
 def print_tables() -> None:  # pragma: nocover
-    c = get_cursor()
+    c = get_write_cursor()
     res = c.execute('''
        SELECT name FROM sqlite_master WHERE type="table"
        ''')
@@ -1,19 +1,92 @@
-import math
-import sqlite3
+import struct
+import functools
+import threading
 
-from riemann import utils as rutils
+from collections import deque, OrderedDict
 
+from zeta import crypto, utils
 from zeta.db import connection
 
 from zeta.zeta_types import Header
-from typing import cast, List, Optional, Tuple, Union
+from typing import cast, Dict, List, Optional, Tuple, Union
+
+
+# NB: the headers table's columns, in order
+HEADER_COLUMNS = (
+    'hash',
+    'version',
+    'prev_block',
+    'merkle_root',
+    'timestamp',
+    'nbits',
+    'nonce',
+    'difficulty',
+    'hex',
+    'height',
+    'accumulated_work')
+
+# NB: statements are built once here so every call hands sqlite3 the same
+#     string, and its statement cache can reuse the prepared statement
+_INSERT_HEADER_SQL = \
+    'INSERT OR REPLACE INTO headers VALUES (?,?,?,?,?,?,?,?,?,?,?)'
+_SELECT_BY_HASH_SQL = 'SELECT * FROM headers WHERE hash = ?'
+_SELECT_BY_HEIGHT_SQL = 'SELECT * FROM headers WHERE height = ?'
+_SELECT_HIGHEST_SQL = \
+    'SELECT * FROM headers WHERE height = (SELECT max(height) FROM headers)'
+_SELECT_HEAVIEST_SQL = (
+    'SELECT * FROM headers WHERE accumulated_work = '
+    '(SELECT max(accumulated_work) FROM headers)')
+_SELECT_HEAVIEST_SUMMARY_SQL = (
+    'SELECT hash, height, accumulated_work FROM headers WHERE '
+    'accumulated_work = (SELECT max(accumulated_work) FROM headers)')
+
+# NB: SQLITE_MAX_VARIABLE_NUMBER before sqlite 3.32
+MAX_SQL_PARAMS = 999
+
+# NB: version, prev_block, merkle_root, timestamp, nbits, nonce
+_HEADER_STRUCT = struct.Struct('<I32s32sI4s4s')
+
+# NB: an LRU of find_by_hash results. Parents are looked up over and over
+#     while syncing. Entries are dropped whenever their hash is written
+#     The generation is bumped on every write so a read that raced a write
+#     doesn't cache what it saw
+HASH_CACHE_SIZE = 4096
+_HASH_CACHE: 'OrderedDict[str, Header]' = OrderedDict()
+_HASH_CACHE_LOCK = threading.Lock()
+_HASH_CACHE_GENERATION = 0
+
+
+def _cache_header(header: Header, generation: int) -> None:
+    with _HASH_CACHE_LOCK:
+        if generation != _HASH_CACHE_GENERATION:
+            return
+        _HASH_CACHE[header['hash']] = cast(Header, dict(header))
+        _HASH_CACHE.move_to_end(header['hash'])
+        if len(_HASH_CACHE) > HASH_CACHE_SIZE:
+            _HASH_CACHE.popitem(last=False)
+
+
+def _uncache_headers(headers: List[Header]) -> None:
+    global _HASH_CACHE_GENERATION
+    with _HASH_CACHE_LOCK:
+        _HASH_CACHE_GENERATION += 1
+        for header in headers:
+            _HASH_CACHE.pop(header['hash'], None)
 
 
-def header_from_row(row: sqlite3.Row) -> Header:
+def clear_cache() -> None:
     '''
-    Does what it says on the tin
+    Empties the find_by_hash cache. Call this after swapping connections
     '''
-    return cast(Header, dict((k, row[k]) for k in row.keys()))
+    with _HASH_CACHE_LOCK:
+        _HASH_CACHE.clear()
+
+
+def header_from_row(row: Tuple) -> Header:
+    '''
+    Does what it says on the tin. Expects a row from SELECT * FROM headers
+    '''
+    return cast(Header, dict(zip(HEADER_COLUMNS, row)))
 
 
 def check_work(header: Header) -> bool:
@@ -28,6 +101,7 @@ def check_work(header: Header) -> bool:
     return int(cast(str, header['hash']), 16) <= make_target(nbits)
 
 
+@functools.lru_cache(maxsize=8192)
 def make_target(nbits: bytes) -> int:
     '''
     converts an nbits from a header into the target
@@ -36,8 +110,15 @@ def make_target(nbits: bytes) -> int:
     Returns:
         (int): the target threshold
     '''
-    exponent = rutils.be2i(nbits[-1:]) - 3
-    return math.floor(rutils.le2i(nbits[:-1]) * 0x100 ** (exponent))
+    exponent = nbits[3] - 3
+    mantissa = int.from_bytes(nbits[:3], 'little')
+    if exponent < 0:
+        return mantissa >> (8 * -exponent)
+    return mantissa << (8 * exponent)
+
+
+# NB: difficulty is measured against the genesis block's target
+_GENESIS_TARGET = make_target(b'\xff\xff\x00\x1d')
 
 
 def parse_difficulty(nbits: bytes) -> int:
@@ -48,7 +129,7 @@ def parse_difficulty(nbits: bytes) -> int:
     Returns:
         (int): the difficulty (no decimals)
     '''
-    return make_target(b'\xff\xff\x00\x1d') // make_target(nbits)
+    return _GENESIS_TARGET // make_target(nbits)
 
 
 def parse_header(header: str) -> Header:
@@ -71,16 +152,42 @@ def parse_header(header: str) -> Header:
     '''
     if len(header) != 160:
         raise ValueError('Invalid header received')
-    as_bytes = bytes.fromhex(header)
-    nbits = as_bytes[72:76]
+    return _parse_header_bytes(bytes.fromhex(header), header)
+
+
+def parse_header_stream(headers_hex: str) -> List[Header]:
+    '''
+    Parses many concatenated headers, like electrum's get_headers returns
+    Decodes the hex once rather than once per header
+    Args:
+        headers_hex (str): hex formatted headers, 80 bytes each
+    Returns:
+        (list(dict)): the parsed headers, in order
+    '''
+    raw = bytes.fromhex(headers_hex)
+    if len(raw) % 80 != 0:
+        raise ValueError('Invalid header stream received')
+    view = memoryview(raw)
+    return [_parse_header_bytes(view[i:i + 80], headers_hex[2 * i:2 * i + 160])
+            for i in range(0, len(raw), 80)]
+
+
+def _parse_header_bytes(
+        as_bytes: Union[bytes, memoryview],
+        header: str) -> Header:
+    '''
+    Parses a header from its bytes. Takes its hex too, so it isn't redone
+    '''
+    (version, prev_block, merkle_root,
+     timestamp, nbits, nonce) = _HEADER_STRUCT.unpack(as_bytes)
     return {
-        'hash': rutils.hash256(bytes.fromhex(header))[::-1].hex(),
-        'version': rutils.le2i(as_bytes[0:4]),
-        'prev_block': as_bytes[4:36][::-1].hex(),
-        'merkle_root': as_bytes[36:68].hex(),
-        'timestamp': rutils.le2i(as_bytes[68:72]),
+        'hash': crypto.hash256(as_bytes)[::-1].hex(),
+        'version': version,
+        'prev_block': prev_block[::-1].hex(),
+        'merkle_root': merkle_root.hex(),
+        'timestamp': timestamp,
         'nbits': nbits.hex(),
-        'nonce': as_bytes[76:80].hex(),
+        'nonce': nonce.hex(),
         'difficulty': parse_difficulty(nbits),
         'hex': header,
         'height': 0,
@@ -88,17 +195,8 @@ def parse_header(header: str) -> Header:
     }
 
 
-def batch_store_header(h: List[Union[Header, str]]) -> bool:
-    '''
-    Stores a batch of headers in the database
-    Args:
-        header list(str or dict): parsed or unparsed header
-    Returns:
-        (bool): true if succesful, false if error
-    '''
+def _sync_batch_store_header(h: List[Union[Header, str]]) -> bool:
     # TODO: Refactor and improve
-    c = connection.get_cursor()
-
     headers: List[Header] = []
 
     for i in range(len(h)):
@@ -111,62 +209,115 @@ def batch_store_header(h: List[Union[Header, str]]) -> bool:
 
     headers = list(filter(check_work, headers))
 
-    # NB: this block finds the last header for which we know a parent
+    # NB: parents inside the batch get filled in by the walk below, so only
+    #     look up the ones outside it. For an ordered batch that's just one
+    #     If none of those are known, a later header may still sit on top of
+    #     a stored one, so fall back to looking up the rest
+    in_batch = {header['hash'] for header in headers}
+    try:
+        known = _find_heights_and_work(
+            [h['prev_block'] for h in headers
+             if h['prev_block'] not in in_batch])
+        if not known:
+            known = _find_heights_and_work(
+                [h['prev_block'] for h in headers
+                 if h['prev_block'] in in_batch])
+    except Exception:
+        return False
+
+    # NB: this block finds the first header for which we know a parent
     #     it discards headers earlier in the batch
     #     this pretty much assumes batches are ordered
+    anchor: Optional[Header] = None
     for i in range(len(headers)):
-        parent = find_by_hash(
-            cast(str, headers[i]['prev_block']))  # type: ignore
-        if parent:
-            headers[i]['height'] = parent['height'] + 1  # type: ignore
+        if headers[i]['prev_block'] in known:
+            parent_height, parent_work = known[headers[i]['prev_block']]
+            headers[i]['height'] = parent_height + 1
             headers[i]['accumulated_work'] = (
-                parent['accumulated_work']  # type: ignore
-                + headers[0]['difficulty'])  # type: ignore
+                parent_work + headers[i]['difficulty'])
+            anchor = headers[i]
             headers = headers[i:]
             break
 
-    # NB: this block checks if the header has a parent in the current batch
-    #     it populates the height and accumulated work fields if so
+    # NB: this block walks from the anchor to its descendants in the batch
+    #     it populates the height and accumulated work fields as it goes
+    children: Dict[str, List[Header]] = {}
     for header in headers:
-        if header['height'] == 0:
-            results = list(filter(  # type: ignore
-                lambda k: k['hash'] == header['prev_block'],
-                headers))
-            # only populate the fields if the parent has a height
-            if len(results) != 0 and results[0]['height'] > 0:  # type: ignore
-                header['height'] = results[0]['height'] + 1  # type: ignore
-                header['accumulated_work'] = (
-                    results[0]['accumulated_work']  # type: ignore
-                    + header['difficulty'])  # type: ignore
+        children.setdefault(header['prev_block'], []).append(header)
 
-    try:
-        for header in headers:
-            c.execute(
+    to_visit = deque([anchor] if anchor is not None else [])
+    while to_visit:
+        parent = to_visit.popleft()
+        for child in children.get(parent['hash'], []):
+            child['height'] = parent['height'] + 1
+            child['accumulated_work'] = (
+                parent['accumulated_work'] + child['difficulty'])
+            to_visit.append(child)
+
+    return _insert_headers(headers)
+
+
+def _header_to_row(header: Header) -> Tuple:
+    '''
+    Flattens a header to a tuple in the headers table's column order
+    '''
+    return (
+        header['hash'],
+        header['version'],
+        header['prev_block'],
+        header['merkle_root'],
+        header['timestamp'],
+        header['nbits'],
+        header['nonce'],
+        header['difficulty'],
+        header['hex'],
+        header['height'],
+        header['accumulated_work'])
+
+
+def _insert_headers(headers: List[Header]) -> bool:
+    '''
+    Writes headers in a single transaction
+    '''
+    with connection.write_cursor() as c:
+        try:
+            rows = [_header_to_row(header) for header in headers]
+            c.execute('BEGIN IMMEDIATE')
+            c.executemany(_INSERT_HEADER_SQL, rows)
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            return False
+        finally:
+            _uncache_headers(headers)
+
+
+def _find_heights_and_work(hashes: List[str]) -> Dict[str, Tuple[int, int]]:
+    '''
+    Finds the height and accumulated work of any known headers in a list
+    Args:
+        hashes (list(str)): 0000-first header hashes
+    Returns:
+        (dict): hash -> (height, accumulated_work) for each known header
+    '''
+    known: Dict[str, Tuple[int, int]] = {}
+    with connection.read_cursor() as c:
+        # NB: older sqlite allows at most 999 params in a statement
+        for i in range(0, len(hashes), MAX_SQL_PARAMS):
+            chunk = hashes[i:i + MAX_SQL_PARAMS]
+            question_marks = ', '.join(['?' for _ in range(len(chunk))])
+            known.update((r[0], (r[1], r[2])) for r in c.execute(
                 '''
-                INSERT OR REPLACE INTO headers VALUES (
-                    :hash,
-                    :version,
-                    :prev_block,
-                    :merkle_root,
-                    :timestamp,
-                    :nbits,
-                    :nonce,
-                    :difficulty,
-                    :hex,
-                    :height,
-                    :accumulated_work)
-                ''',
-                (header))
-        connection.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        c.close()
+                SELECT hash, height, accumulated_work FROM headers
+                WHERE hash IN ({question_marks})
+                '''.format(question_marks=question_marks),
+                chunk))
+    return known
 
 
 def parent_height_and_work(header: Header) -> Tuple[int, int]:
-    parent = find_by_hash(header['prev_block'])
+    parent = _sync_find_by_hash(header['prev_block'])
     if parent:
         parent_work = parent['accumulated_work']
         parent_height = parent['height']
@@ -175,14 +326,7 @@ def parent_height_and_work(header: Header) -> Tuple[int, int]:
         return 0, 0
 
 
-def store_header(header: Union[Header, str]) -> bool:
-    '''
-    Stores a header in the database
-    Args:
-        header (str or dict): parsed or unparsed header
-    Returns:
-        (bool): true if succesful, false if error
-    '''
+def _sync_store_header(header: Union[Header, str]) -> bool:
     if isinstance(header, str):
         header = parse_header(header)
 
@@ -199,33 +343,75 @@ def store_header(header: Union[Header, str]) -> bool:
             header['height'] = 0
             header['accumulated_work'] = 0
 
-    c = connection.get_cursor()
-    try:
-        c.execute(
-            '''
-            INSERT OR REPLACE INTO headers VALUES (
-                :hash,
-                :version,
-                :prev_block,
-                :merkle_root,
-                :timestamp,
-                :nbits,
-                :nonce,
-                :difficulty,
-                :hex,
-                :height,
-                :accumulated_work)
-            ''',
-            (header))
-        connection.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        c.close()
+    return _insert_headers([header])
+
+
+def _sync_find_by_height(height: int) -> List[Header]:
+    with connection.read_cursor() as c:
+        res = [header_from_row(r) for r in c.execute(
+            _SELECT_BY_HEIGHT_SQL, (height,))]
+        return res
+
+
+def _sync_find_by_hash(hash: str) -> Optional[Header]:
+    with _HASH_CACHE_LOCK:
+        cached = _HASH_CACHE.get(hash)
+        if cached is not None:
+            _HASH_CACHE.move_to_end(hash)
+            return cast(Header, dict(cached))
+        generation = _HASH_CACHE_GENERATION
+
+    with connection.read_cursor() as c:
+        res = [header_from_row(r) for r in c.execute(
+            _SELECT_BY_HASH_SQL, (hash,))]
+        if len(res) != 0:
+            _cache_header(res[0], generation)
+            return res[0]
+        return None
+
+
+def _sync_find_highest() -> List[Header]:
+    with connection.read_cursor() as c:
+        res = [header_from_row(r) for r in c.execute(
+            _SELECT_HIGHEST_SQL)]
+        return res
+
+
+def _sync_find_heaviest_summary() -> Optional[Tuple[str, int, int]]:
+    with connection.read_cursor() as c:
+        return c.execute(_SELECT_HEAVIEST_SUMMARY_SQL).fetchone()
+
+
+def _sync_find_heaviest() -> List[Header]:
+    with connection.read_cursor() as c:
+        res = [header_from_row(r) for r in c.execute(
+            _SELECT_HEAVIEST_SQL)]
+        return res
+
+
+async def batch_store_header(h: List[Union[Header, str]]) -> bool:
+    '''
+    Stores a batch of headers in the database
+    Args:
+        header list(str or dict): parsed or unparsed header
+    Returns:
+        (bool): true if succesful, false if error
+    '''
+    return await utils.run_in_thread(_sync_batch_store_header, h)
 
 
-def find_by_height(height: int) -> List[Header]:
+async def store_header(header: Union[Header, str]) -> bool:
+    '''
+    Stores a header in the database
+    Args:
+        header (str or dict): parsed or unparsed header
+    Returns:
+        (bool): true if succesful, false if error
+    '''
+    return await utils.run_in_thread(_sync_store_header, header)
+
+
+async def find_by_height(height: int) -> List[Header]:
     '''
     Finds headers by blockheight. Can return more than 1
     Args:
@@ -243,20 +429,10 @@ def find_by_height(height: int) -> List[Header]:
             hex         (str): the full header as hex
             height      (int): the block height
     '''
-    c = connection.get_cursor()
-    try:
-        res = [header_from_row(r) for r in c.execute(
-            '''
-            SELECT * FROM headers
-            WHERE height = :height
-            ''',
-            {'height': height})]
-        return res
-    finally:
-        c.close()
+    return await utils.run_in_thread(_sync_find_by_height, height)
 
 
-def find_by_hash(hash: str) -> Optional[Header]:
+async def find_by_hash(hash: str) -> Optional[Header]:
     '''
     Finds a header by hash
     Args:
@@ -274,45 +450,22 @@ def find_by_hash(hash: str) -> Optional[Header]:
             hex         (str): the full header as hex
             height      (int): the block height
     '''
-    c = connection.get_cursor()
-    try:
-        res = [header_from_row(r) for r in c.execute(
-            '''
-            SELECT * FROM headers
-            WHERE hash = :hash
-            ''',
-            {'hash': hash})]
-        if len(res) != 0:
-            return res[0]
-        return None
-    finally:
-        c.close()
+    return await utils.run_in_thread(_sync_find_by_hash, hash)
 
 
-def find_highest() -> List[Header]:
-    c = connection.get_cursor()
-    try:
-        res = [header_from_row(r) for r in c.execute(
-            '''
-            SELECT * FROM headers
-            WHERE height = (SELECT max(height) FROM headers)
-            '''
-        )]
-        return res
-    finally:
-        c.close()
+async def find_highest() -> List[Header]:
+    return await utils.run_in_thread(_sync_find_highest)
 
 
-def find_heaviest() -> List[Header]:
-    c = connection.get_cursor()
-    try:
-        res = [header_from_row(r) for r in c.execute(
-            '''
-            SELECT * FROM headers
-            WHERE accumulated_work =
-                (SELECT max(accumulated_work) FROM headers)
-            '''
-        )]
-        return res
-    finally:
-        c.close()
+async def find_heaviest_summary() -> Optional[Tuple[str, int, int]]:
+    '''
+    Finds the hash, height and accumulated work of a heaviest header
+    Cheaper than find_heaviest when the rest of the header isn't needed
+    Returns:
+        (tuple): hash, height, accumulated_work. None if there are no headers
+    '''
+    return await utils.run_in_thread(_sync_find_heaviest_summary)
+
+
+async def find_heaviest() -> List[Header]:
+    return await utils.run_in_thread(_sync_find_heaviest)
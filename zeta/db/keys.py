@@ -56,49 +56,45 @@ def store_key(key_entry: KeyEntry, secret_phrase: Optional[str]) -> bool:
 
     k = key_entry.copy()  # type: ignore
 
-    c = connection.get_cursor()
-    try:
-        k['privkey'] = crypto.encode_aes(
-            message_bytes=k['privkey'],
-            secret_phrase=cast(str, secret_phrase))
-        c.execute(
-            '''
-            INSERT OR IGNORE INTO addresses VALUES (
-                :address,
-                :script)
-            ''',
-            {'address': k['address'], 'script': b''})
-        c.execute(
-            '''
-            INSERT OR REPLACE INTO keys VALUES (
-                :pubkey,
-                :privkey,
-                :derivation,
-                :chain,
-                :address)
-            ''',
-            k)
-        connection.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        c.close()
+    with connection.write_cursor() as c:
+        try:
+            k['privkey'] = crypto.encode_aes(
+                message_bytes=k['privkey'],
+                secret_phrase=cast(str, secret_phrase))
+            c.execute(
+                '''
+                INSERT OR IGNORE INTO addresses VALUES (
+                    :address,
+                    :script)
+                ''',
+                {'address': k['address'], 'script': b''})
+            c.execute(
+                '''
+                INSERT OR REPLACE INTO keys VALUES (
+                    :pubkey,
+                    :privkey,
+                    :derivation,
+                    :chain,
+                    :address)
+                ''',
+                k)
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            return False
 
 
 def find_one() -> Optional[KeyEntry]:
     '''
     Finds some key. Useful for checking if there's a valid key in there
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = c.execute(
             '''
             SELECT * FROM keys
             ''').fetchone()
         return res if res is None else key_from_row(res)
-    finally:
-        c.close()
 
 
 def find_by_address(
@@ -109,8 +105,7 @@ def find_by_address(
     finds a key by its primary address
     its primary address is the bech32 p2wpkh of its compressed pubkey
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = c.execute(
             '''
             SELECT * FROM keys
@@ -122,8 +117,6 @@ def find_by_address(
             # we know there can only be one
             return key_from_row(a, secret_phrase, get_priv)
         return None
-    finally:
-        c.close()
 
 
 def find_by_pubkey(
@@ -133,8 +126,7 @@ def find_by_pubkey(
     '''
     finds a key by its pubkey
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [key_from_row(r, secret_phrase, get_priv) for r in c.execute(
             '''
             SELECT * FROM keys
@@ -142,8 +134,6 @@ def find_by_pubkey(
             ''',
             {'pubkey': pubkey})]
         return res
-    finally:
-        c.close()
 
 
 def find_by_script(
@@ -153,8 +143,7 @@ def find_by_script(
     '''
     Finds all KeyEntries whose pubkey appears in a certain script
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [key_from_row(r, secret_phrase, get_priv) for r in c.execute(
             '''
             SELECT * FROM keys
@@ -164,16 +153,11 @@ def find_by_script(
             ''',
             {'script': script})]
         return res
-    finally:
-        c.close()
 
 
 def count_keys() -> int:
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         return c.execute(
             '''
             SELECT COUNT(*) FROM keys
             ''').fetchone()[0]
-    finally:
-        c.close()
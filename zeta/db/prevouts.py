@@ -7,7 +7,10 @@ from zeta import utils
 from zeta.db import connection
 from zeta.zeta_types import Outpoint, Prevout, PrevoutEntry
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+# NB: positional params bind straight from a tuple, with no dict lookups
+_INSERT_PREVOUT_SQL = 'INSERT OR REPLACE INTO prevouts VALUES (?,?,?,?,?,?,?)'
 
 
 def prevout_from_row(row: sqlite3.Row) -> Prevout:
@@ -37,6 +40,20 @@ def _flatten_prevout(prevout: Prevout) -> PrevoutEntry:
     }
 
 
+def _prevout_to_row(entry: PrevoutEntry) -> Tuple:
+    '''
+    Flattens a prevout entry to a tuple in the prevouts table's column order
+    '''
+    return (
+        entry['outpoint'],
+        entry['tx_id'],
+        entry['idx'],
+        entry['value'],
+        entry['spent_at'],
+        entry['spent_by'],
+        entry['address'])
+
+
 def validate_prevout(prevout: Prevout) -> bool:
     '''
     Validates the internal structure of a prevout
@@ -59,31 +76,19 @@ def store_prevout(prevout: Prevout) -> bool:
     Return:
         (bool): true if successful, false if error
     '''
-    c = connection.get_cursor()
-
     if not validate_prevout(prevout):
         return False
 
-    try:
-        flattened = _flatten_prevout(prevout)
-        c.execute(
-            '''
-            INSERT OR REPLACE INTO prevouts VALUES (
-                :outpoint,
-                :tx_id,
-                :idx,
-                :value,
-                :spent_at,
-                :spent_by,
-                :address)
-            ''',
-            flattened)
-        connection.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        c.close()
+    with connection.write_cursor() as c:
+        try:
+            c.execute(
+                _INSERT_PREVOUT_SQL,
+                _prevout_to_row(_flatten_prevout(prevout)))
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            return False
 
 
 def batch_store_prevout(prevout_list: List[Prevout]) -> bool:
@@ -94,33 +99,20 @@ def batch_store_prevout(prevout_list: List[Prevout]) -> bool:
     Returns:
         (bool): True if prevouts were stored, false otherwise
     '''
-    c = connection.get_cursor()
-
     for prevout in prevout_list:
         if not validate_prevout(prevout):
             return False
 
-    try:
-        flattened_list = list(map(_flatten_prevout, prevout_list))
-        for prevout_entry in flattened_list:
-            c.execute(
-                '''
-                INSERT OR REPLACE INTO prevouts VALUES (
-                    :outpoint,
-                    :tx_id,
-                    :idx,
-                    :value,
-                    :spent_at,
-                    :spent_by,
-                    :address)
-                ''',
-                prevout_entry)
-        connection.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        c.close()
+    with connection.write_cursor() as c:
+        try:
+            rows = [_prevout_to_row(_flatten_prevout(prevout))
+                    for prevout in prevout_list]
+            c.executemany(_INSERT_PREVOUT_SQL, rows)
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            return False
 
 
 def find_by_address(address: str) -> List[Prevout]:
@@ -130,22 +122,17 @@ def find_by_address(address: str) -> List[Prevout]:
     Args:
         address (str):
     '''
-    c = connection.get_cursor()
-
-    try:
+    with connection.read_cursor(named=True) as c:
         return [prevout_from_row(r) for r in c.execute(
             '''
             SELECT * FROM prevouts
             WHERE address = :address
             ''',
             {'address': address})]
-    finally:
-        c.close()
 
 
 def find_by_tx_id(tx_id: str) -> List[Prevout]:
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [prevout_from_row(p) for p in c.execute(
             '''
             SELECT * from prevouts
@@ -154,13 +141,10 @@ def find_by_tx_id(tx_id: str) -> List[Prevout]:
             {'tx_id': tx_id}
         )]
         return res
-    finally:
-        c.close()
 
 
 def find_by_outpoint(outpoint: Outpoint) -> Optional[Prevout]:
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [prevout_from_row(p) for p in c.execute(
             '''
             SELECT * from prevouts
@@ -174,13 +158,10 @@ def find_by_outpoint(outpoint: Outpoint) -> Optional[Prevout]:
             # we know there can only be one
             return p
         return None
-    finally:
-        c.close()
 
 
 def find_all_unspents() -> List[Prevout]:
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [prevout_from_row(p) for p in c.execute(
             '''
             SELECT * from prevouts
@@ -188,13 +169,10 @@ def find_all_unspents() -> List[Prevout]:
             '''
         )]
         return res
-    finally:
-        c.close()
 
 
 def find_by_child(child_tx_id: str) -> List[Prevout]:
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [prevout_from_row(p) for p in c.execute(
             '''
             SELECT * from prevouts
@@ -203,16 +181,13 @@ def find_by_child(child_tx_id: str) -> List[Prevout]:
             {'child_tx_id': child_tx_id}
         )]
         return res
-    finally:
-        c.close()
 
 
 def find_by_value_range(
         lower_value: int,
         upper_value: int,
         unspents_only: bool = True) -> List[Prevout]:
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         # I don't like this.
         # figure out how to do this without string format
         res = [prevout_from_row(p) for p in c.execute(
@@ -225,8 +200,6 @@ def find_by_value_range(
             {'upper_value': upper_value,
              'lower_value': lower_value})]
         return res
-    finally:
-        c.close()
 
 
 def find_spent_by_mempool_tx() -> List[Prevout]:
@@ -234,8 +207,7 @@ def find_spent_by_mempool_tx() -> List[Prevout]:
     Finds prevouts that have been spent by a tx in the mempool
     Useful for checking if a tx can be replaced or has confirmed
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         # I don't like this.
         # figure out how to do this without string format
         res = [prevout_from_row(p) for p in c.execute(
@@ -244,8 +216,6 @@ def find_spent_by_mempool_tx() -> List[Prevout]:
             WHERE spent_at == -1
             ''')]
         return res
-    finally:
-        c.close()
 
 
 def check_for_known_outpoints(
@@ -262,8 +232,7 @@ def check_for_known_outpoints(
             index=rutils.i2le_padded(o['index'], 4).hex())
         flattened_list.append(flat_outpoint)
 
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         question_marks = ', '.join(['?' for _ in range(len(outpoint_list))])
         cursor = c.execute(
             '''
@@ -273,20 +242,15 @@ def check_for_known_outpoints(
             flattened_list)
         res = [Outpoint(tx_id=p['tx_id'], index=p['idx']) for p in cursor]
         return res
-    finally:
-        c.close()
 
 
 def find_all() -> List[Prevout]:
     '''
     Finds all prevouts
     '''
-    c = connection.get_cursor()
-    try:
+    with connection.read_cursor(named=True) as c:
         res = [prevout_from_row(r) for r in c.execute(
             '''
             SELECT * FROM prevouts
             ''')]
         return res
-    finally:
-        c.close()
@@ -1,4 +1,5 @@
 import asyncio
+import itertools
 
 from riemann import tx
 
@@ -9,39 +10,54 @@ from zeta.electrum.metaclient import MetaClient
 from typing import Any, Dict, List, Optional
 from zeta.zeta_types import ElectrumGetHeadersResponse
 
-_CLIENT: Optional[MetaClient] = None
+# NB: plain RPCs are spread round-robin over the pool
+#     subscriptions are pinned to the first client so notifications are stable
+NUM_CLIENTS = 4
+_CLIENTS: List[MetaClient] = []
+_CLIENTS_LOCK: Optional[asyncio.Lock] = None
+_RR = itertools.count()
+
+# NB: servers limit how many requests a session can have in flight
+SUBSCRIPTION_CHUNK_SIZE = 200
 
 
 async def _make_client(network: str) -> MetaClient:  # pragma: nocover
     '''
-    TODO: Improve
-    Gets a singleton metaclient
+    Sets up the pool of metaclients if it doesn't exist yet
 
     Returns:
-        (zeta.electrum.metaclient.MetaClient): an Electrum metaclient
+        (zeta.electrum.metaclient.MetaClient): the first Electrum metaclient
     '''
-    global _CLIENT
+    global _CLIENTS
+    global _CLIENTS_LOCK
 
-    if _CLIENT is None:
-        client = MetaClient()
-        await client.setup_connections(network)
-        _CLIENT = client
-        return _CLIENT
-    else:
-        return _CLIENT
+    if _CLIENTS_LOCK is None:
+        _CLIENTS_LOCK = asyncio.Lock()
 
+    async with _CLIENTS_LOCK:
+        if len(_CLIENTS) == 0:
+            clients = [MetaClient() for _ in range(NUM_CLIENTS)]
+            await asyncio.gather(
+                *[c.setup_connections(network) for c in clients])
+            _CLIENTS = clients
+    return _CLIENTS[0]
 
-async def _get_client() -> MetaClient:  # pragma: nocover
+
+async def _get_client(
+        shard: Optional[int] = None) -> MetaClient:  # pragma: nocover
     '''
-    TODO: Improve
-    Gets a singleton metaclient
+    Gets a metaclient from the pool
 
+    Args:
+        shard (int): a specific client to use. round-robin if None
     Returns:
         (zeta.electrum.metaclient.MetaClient): an Electrum metaclient
     '''
-    while _CLIENT is None:
+    while len(_CLIENTS) == 0:
         await asyncio.sleep(5)
-    return _CLIENT
+    if shard is None:
+        shard = next(_RR)
+    return _CLIENTS[shard % len(_CLIENTS)]
 
 
 async def subscribe_to_headers(outq: asyncio.Queue) -> None:
@@ -50,7 +66,7 @@ async def subscribe_to_headers(outq: asyncio.Queue) -> None:
     Args:
         outq     (asyncio.Queue): a queue to route incoming events to
     '''
-    client = await _get_client()
+    client = await _get_client(0)
     fut, q = client.subscribe('blockchain.headers.subscribe', True)  # NB: raw
     await outq.put(await fut)
     asyncio.ensure_future(utils.queue_forwarder(q, outq))
@@ -73,6 +89,25 @@ async def get_headers(
     return await client.RPC('blockchain.block.headers', start_height, count)
 
 
+async def get_txs(tx_ids: List[str]) -> List[Optional[tx.Tx]]:
+    '''
+    Gets many transactions in one JSON-RPC batch
+    Args:
+        tx_ids (list(str)): hex tx_ids of txns to get
+    Returns:
+        (list(riemann.tx.Tx)): the deserialized transactions, None if missing
+    '''
+    if len(tx_ids) == 0:
+        return []
+    client = await _get_client()
+    tx_res = await client.batch_RPC(
+        'blockchain.transaction.get',
+        [(tx_id,) for tx_id in tx_ids])
+    if tx_res is None:
+        return [None for _ in tx_ids]
+    return [tx.Tx.from_hex(t) if t else None for t in tx_res]
+
+
 async def get_tx(tx_id: str) -> Optional[tx.Tx]:
     '''
     Args:
@@ -80,12 +115,7 @@ async def get_tx(tx_id: str) -> Optional[tx.Tx]:
     Returns:
         (riemann.tx.Tx): the deserialized transaction
     '''
-    client = await _get_client()
-    tx_res = await client.RPC('blockchain.transaction.get', tx_id)
-    if tx_res:
-        return tx.Tx.from_hex(tx_res)
-    else:
-        return None
+    return (await get_txs([tx_id]))[0]
 
 
 async def get_tx_verbose(tx_id: str) -> Optional[Dict[str, Any]]:
@@ -103,18 +133,14 @@ async def get_tx_verbose(tx_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-async def subscribe_to_address(
+async def _sub_one(
+        client: MetaClient,
         address: str,
         outq: asyncio.Queue) -> None:
     '''
-    Subscribes to an address.
-    NB: Subscribing only triggers notification of updates
-        It does NOT give any info about what the update is :(
-
-    Args:
-        address (str): the address to subscribe to
+    Subscribes a client to one address. Forwards events to a queue
+    Skips addresses that have no electrum scripthash
     '''
-    client = await _get_client()
     try:
         sh = eutils.address_to_electrum_scripthash(address)
         fut, q = client.subscribe('blockchain.scripthash.subscribe', sh)
@@ -124,11 +150,27 @@ async def subscribe_to_address(
         return
 
 
+async def subscribe_to_address(
+        address: str,
+        outq: asyncio.Queue) -> None:
+    '''
+    Subscribes to an address.
+    NB: Subscribing only triggers notification of updates
+        It does NOT give any info about what the update is :(
+
+    Args:
+        address (str): the address to subscribe to
+    '''
+    client = await _get_client(0)
+    await _sub_one(client, address, outq)
+
+
 async def subscribe_to_addresses(
         address_list: List[str],
         outq: asyncio.Queue) -> None:
     '''
     Subscribes to a list of addresses. Forwards events to a provided queue
+    Sends up to SUBSCRIPTION_CHUNK_SIZE subscriptions at once
     NB: Subscribing only triggers notification of updates
         It does NOT give any info about what the update is :(
 
@@ -136,30 +178,73 @@ async def subscribe_to_addresses(
         address_list (list(str)): the addresses to subscribe to
         outq     (asyncio.Queue): a queue to route incoming events to
     '''
-    client = await _get_client()
-    for address in address_list:
+    client = await _get_client(0)
+    errors: List[BaseException] = []
+    for i in range(0, len(address_list), SUBSCRIPTION_CHUNK_SIZE):
+        chunk = address_list[i:i + SUBSCRIPTION_CHUNK_SIZE]
+        results = await asyncio.gather(
+            *[_sub_one(client, a, outq) for a in chunk],
+            return_exceptions=True)
+        errors.extend(r for r in results if isinstance(r, BaseException))
+
+    # NB: subscribe to everything we can, then surface the first failure
+    if len(errors) != 0:
+        raise errors[0]
+
+
+async def _batch_scripthash_RPC(
+        method: str,
+        address_list: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+    '''
+    Calls a scripthash RPC for each address in one JSON-RPC batch
+    Addresses without an electrum scripthash get an empty list
+    Addresses we get no response for get None
+    '''
+    results: List[Optional[List[Dict[str, Any]]]] = [
+        [] for _ in address_list]
+
+    scripthashes: Dict[int, str] = {}
+    for i, address in enumerate(address_list):
         try:
-            sh = eutils.address_to_electrum_scripthash(address)
-            fut, q = client.subscribe('blockchain.scripthash.subscribe', sh)
-            await outq.put(await fut)
-            asyncio.ensure_future(utils.queue_forwarder(q, outq))
+            scripthashes[i] = eutils.address_to_electrum_scripthash(address)
         except ValueError:
             continue
 
+    if len(scripthashes) == 0:
+        return results
+
+    client = await _get_client()
+    res = await client.batch_RPC(
+        method,
+        [(sh,) for sh in scripthashes.values()])
+    for j, i in enumerate(scripthashes.keys()):
+        results[i] = None if res is None else res[j]
+    return results
+
+
+async def get_unspents_many(
+        address_list: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+    '''
+    Args:
+        address_list (list(str)): the addresses to check
+    Returns:
+        (list(list(dict))): per address: tx_hash (BE), tx_pos, height, value
+                            None for an address if we got no response
+    '''
+    return await _batch_scripthash_RPC(
+        'blockchain.scripthash.listunspent',
+        address_list)
+
 
-async def get_unspents(address: str) -> List[Dict[str, Any]]:
+async def get_unspents(address: str) -> Optional[List[Dict[str, Any]]]:
     '''
     Args:
         address          (str): the address to check
     Returns:
         (list(dict)): tx_hash (BE), tx_pos, height, value
+                      None if we got no response
     '''
-    client = await _get_client()
-    try:
-        sh = eutils.address_to_electrum_scripthash(address)
-        return await client.RPC('blockchain.scripthash.listunspent', sh)
-    except ValueError:
-        return []
+    return (await get_unspents_many([address]))[0]
 
 
 async def get_mempool(address: str) -> List[Dict[str, Any]]:
@@ -177,19 +262,29 @@ async def get_mempool(address: str) -> List[Dict[str, Any]]:
         return []
 
 
-async def get_history(address: str) -> List[Dict[str, Any]]:
+async def get_history_many(
+        address_list: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+    '''
+    Args:
+        address_list (list(str)): the addresses to check
+    Returns:
+        (list(list(dict))): per address: tx_hash (BE), height, fee
+                            None for an address if we got no response
+    '''
+    return await _batch_scripthash_RPC(
+        'blockchain.scripthash.get_history',
+        address_list)
+
+
+async def get_history(address: str) -> Optional[List[Dict[str, Any]]]:
     '''
     Args:
         address          (str): the address to check
     Returns:
         (list(dict)): tx_hash (BE), height, fee
+                      None if we got no response
     '''
-    client = await _get_client()
-    try:
-        sh = eutils.address_to_electrum_scripthash(address)
-        return await client.RPC('blockchain.scripthash.get_history', sh)
-    except ValueError:
-        return []
+    return (await get_history_many([address]))[0]
 
 
 async def estimate_fee(blocks: int = 2) -> int:
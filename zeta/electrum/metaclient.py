@@ -126,6 +126,49 @@ class MetaClient():
         # send those coros for aggregation
         return await self._aggregate_results(coros)
 
+    async def _batch(
+            self,
+            c: StratumClient,
+            requests: List[Tuple[Any, ...]]) -> List[Any]:
+        '''
+        Sends a list of requests to one server as a single JSON-RPC batch
+        Entries the server answers with an error come back as None
+        '''
+        # NB: older connectrum versions can't batch. pipeline them instead
+        #     one errored entry fails the whole batch, so redo it the same way
+        if hasattr(c, 'batch_rpc'):
+            try:
+                return await c.batch_rpc(requests)
+            except ElectrumErrorResponse:
+                pass
+        res = await asyncio.gather(
+            *[c.RPC(*r) for r in requests],
+            return_exceptions=True)
+        for r in res:
+            if isinstance(r, Exception) \
+                    and type(r) is not ElectrumErrorResponse:
+                raise r
+        return [None if type(r) is ElectrumErrorResponse else r for r in res]
+
+    async def batch_RPC(
+            self,
+            method: str,
+            params_list: List[Tuple[Any, ...]]) -> Any:
+        '''
+        Calls an electrum RPC once per params tuple on multiple clients
+        Each client gets all the calls in one JSON-RPC batch
+
+        Returns:
+            (list): the results, in the same order as params_list
+                    None if no client responds
+        '''
+        requests = [(method, *params) for params in params_list]
+        client_set = random.choices(self._clients, k=self._random_set_size)
+        coros: List[Awaitable[Any]] = [
+            self._batch(c, requests) for c in client_set]
+
+        return await self._aggregate_results(coros)
+
     def subscribe(self, *args) -> Tuple[Awaitable, asyncio.Queue]:
         q: asyncio.Queue = asyncio.Queue()
 
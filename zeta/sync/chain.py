@@ -1,6 +1,6 @@
 import asyncio
 
-from zeta import electrum
+from zeta import electrum, utils
 from zeta.db import checkpoint, headers
 
 from zeta.zeta_types import Header
@@ -17,7 +17,7 @@ async def sync(
     3. clean up any headers that didn't fit a chain when we found them
     4. print status updates
     '''
-    last_known_height = _initial_setup(network)
+    last_known_height = await _initial_setup(network)
     # NB: assume there hasn't been a 10 block reorg
     asyncio.ensure_future(_track_chain_tip(outq))
     asyncio.ensure_future(_catch_up(last_known_height))
@@ -25,7 +25,7 @@ async def sync(
     # asyncio.ensure_future(_status_updater())
 
 
-def _initial_setup(network: str) -> int:
+async def _initial_setup(network: str) -> int:
     '''
     Ensures the database directory exists, and tables exist
     Then set the highest checkpoint, and return its height
@@ -34,9 +34,9 @@ def _initial_setup(network: str) -> int:
     latest_checkpoint = max(
         checkpoint.CHECKPOINTS[network],
         key=lambda k: k['height'])
-    headers.store_header(latest_checkpoint)
+    await headers.store_header(latest_checkpoint)
 
-    return cast(int, headers.find_highest()[0]['height'])
+    return cast(int, (await headers.find_highest())[0]['height'])
 
 
 async def _track_chain_tip(
@@ -67,7 +67,7 @@ async def _header_queue_handler(
         except Exception:
             header_dict = header
 
-        headers.store_header(header_dict['hex'])
+        await headers.store_header(header_dict['hex'])
 
         if outq is not None:
             await outq.put(header_dict)
@@ -83,10 +83,13 @@ async def _catch_up(from_height: int) -> None:
     '''
     electrum_response = await electrum.get_headers(from_height, 2016)
 
+    # NB: store this batch before starting the next. the next one looks up
+    #     its parents, and would store itself at height 0 if they're missing
+    await _process_header_batch(electrum_response['hex'])
+
     # NB: we requested 2016. If we got back 2016, it's likely there are more
     if electrum_response['count'] == 2016:
         asyncio.ensure_future(_catch_up(from_height + 2014))
-    _process_header_batch(electrum_response['hex'])
 
 
 async def _maintain_db() -> None:
@@ -98,23 +101,22 @@ async def _maintain_db() -> None:
         await asyncio.sleep(60)
 
         # NB: 0 means no known parent
-        floating = headers.find_by_height(0)
+        floating = await headers.find_by_height(0)
 
         # NB: this will attempt to find their parent and fill in height/accdiff
         for header in floating:
-            headers.store_header(header)
+            await headers.store_header(header)
 
 
-def _process_header_batch(electrum_hex: str) -> None:
+async def _process_header_batch(electrum_hex: str) -> None:
     '''
     Processes a batch of headers and sends to the DB for storage
     Args:
         electrum_hex (str): The 'hex' attribute of electrum's getheaders res
     '''
-    blob = bytes.fromhex(electrum_hex)
-
     # NB: this comes as a single hex string with all headers concatenated
     header_list: List[Union[Header, str]]
-    header_list = [blob[i:i + 80].hex() for i in range(0, len(blob), 80)]
+    header_list = await utils.run_in_thread(
+        headers.parse_header_stream, electrum_hex)
 
-    headers.batch_store_header(header_list)
+    await headers.batch_store_header(header_list)
@@ -68,6 +68,9 @@ async def _get_address_unspents(
     If an out queue is provided, it'll push new prevouts to the queue
     '''
     unspents = await electrum.get_unspents(address)
+    # NB: no response is not the same as no unspents. leave the db alone
+    if unspents is None:
+        return
     prevout_list = _parse_electrum_unspents(unspents, address)
     elec_outpoints = [p['outpoint'] for p in prevout_list]
 
@@ -176,7 +179,7 @@ async def _update_recently_spent(
                     if outq is not None:
                         await outq.put(prevout)
                 elif 'blockhash' in tx:
-                    header = headers.find_by_hash(tx['blockhash'])
+                    header = await headers.find_by_hash(tx['blockhash'])
                     if header is not None:
                         # we found its header
                         prevout['spent_at'] = header['height']
@@ -229,7 +232,7 @@ async def _update_children_in_mempool(
             #     if it has 10+ confs, update its `spent_at` and store
             #     we should also notify the frontend that we found it
             if tx_details['confirmations'] >= 10:
-                h = headers.find_by_hash(tx_details['blockhash'])
+                h = await headers.find_by_hash(tx_details['blockhash'])
                 if h is None:
                     continue
                 else:
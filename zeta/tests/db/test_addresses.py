@@ -10,7 +10,6 @@ class TestAddresses(unittest.TestCase):
     def setUp(self):
         # Replace the connection with an in-memory DB
         c = sqlite3.connect(':memory:')
-        c.row_factory = sqlite3.Row
         connection.CONN = c
         connection.ensure_tables()
 
@@ -1,13 +1,139 @@
+import shutil
+import sqlite3
+import tempfile
+import threading
 import unittest
 from unittest import mock
 
-from zeta.db import connection
+from zeta.db import connection, headers
 
 
 class TestConnect(unittest.TestCase):
 
-    @mock.patch('zeta.db.connection.get_cursor')
+    @mock.patch('zeta.db.connection.get_write_cursor')
     def test_ensure_tables(self, mock_get_cursor):
         mock_get_cursor.return_value.execute.side_effect = ValueError()
 
         self.assertFalse(connection.ensure_tables())
+
+    def test_header_indexes(self):
+        connection.CONN = sqlite3.connect(':memory:')
+        try:
+            self.assertTrue(connection.ensure_tables())
+            plan = connection.CONN.execute(
+                '''
+                EXPLAIN QUERY PLAN SELECT * FROM headers
+                WHERE accumulated_work =
+                    (SELECT max(accumulated_work) FROM headers)
+                ''').fetchall()
+            details = ' '.join(r[3] for r in plan)
+            self.assertIn('USING COVERING INDEX headers_work_idx', details)
+            self.assertNotIn('SCAN', details)
+        finally:
+            connection.CONN.close()
+
+    def test_read_cursor_without_pool(self):
+        connection.CONN = sqlite3.connect(
+            ':memory:', check_same_thread=False)
+        results = []
+
+        def read():
+            with connection.read_cursor() as c:
+                results.append(c.execute('SELECT 1').fetchone())
+
+        try:
+            # NB: with no pool, reads wait for the write connection's lock
+            with connection.WRITE_LOCK:
+                t = threading.Thread(target=read)
+                t.start()
+                t.join(0.1)
+                self.assertEqual(results, [])
+            t.join()
+            self.assertEqual(results, [(1,)])
+
+            # NB: so does handing out the write connection itself
+            reader = connection.acquire_reader()
+            self.assertIs(reader, connection.CONN)
+            self.assertFalse(connection.WRITE_LOCK.acquire(blocking=False))
+            connection.release_reader(reader)
+            self.assertTrue(connection.WRITE_LOCK.acquire(blocking=False))
+            connection.WRITE_LOCK.release()
+        finally:
+            connection.CONN.close()
+
+    def test_reader_pool(self):
+        path = tempfile.mkdtemp()
+        try:
+            connection.init_conn(path=path, db_name='test')
+            mode = connection.CONN.execute('PRAGMA journal_mode').fetchone()
+            self.assertEqual(mode[0], 'wal')
+
+            page_size = connection.CONN.execute('PRAGMA page_size').fetchone()
+            self.assertEqual(page_size[0], 8192)
+
+            reader = connection.acquire_reader()
+            self.assertIsNot(reader, connection.CONN)
+            timeout = reader.execute('PRAGMA busy_timeout').fetchone()
+            self.assertEqual(timeout[0], 5000)
+            connection.release_reader(reader)
+            self.assertEqual(
+                connection._READERS.qsize(),
+                connection.NUM_READERS)
+
+            # NB: readers see named rows, and only what's been committed
+            connection.CONN.execute(
+                "INSERT INTO addresses VALUES ('a', x'')")
+            with connection.read_cursor(named=True) as c:
+                self.assertIsNot(c.connection, connection.CONN)
+                self.assertEqual(
+                    c.execute('SELECT * FROM addresses').fetchall(), [])
+            connection.commit()
+            with connection.read_cursor(named=True) as c:
+                row = c.execute('SELECT * FROM addresses').fetchone()
+                self.assertEqual(row['address'], 'a')
+        finally:
+            connection.close_conn()
+            shutil.rmtree(path)
+
+    def test_read_cursor_resets_statement(self):
+        path = tempfile.mkdtemp()
+        try:
+            connection.init_conn(path=path, db_name='test')
+            connection.CONN.executemany(
+                'INSERT INTO addresses VALUES (?, ?)',
+                [('a', b''), ('b', b'')])
+            connection.commit()
+
+            # NB: a half-read select must not hold the WAL open
+            with connection.read_cursor() as c:
+                c.execute('SELECT * FROM addresses').fetchone()
+            self.assertEqual(
+                connection.CONN.execute(
+                    'PRAGMA wal_checkpoint(TRUNCATE)').fetchone(),
+                (0, 0, 0))
+        finally:
+            connection.close_conn()
+            shutil.rmtree(path)
+
+    def test_init_conn_closes_old_connections(self):
+        path = tempfile.mkdtemp()
+        try:
+            connection.init_conn(path=path, db_name='test')
+            old_conn = connection.CONN
+            old_readers = list(connection._READERS.queue)
+            with connection.read_cursor():
+                pass
+            headers._HASH_CACHE['00'] = {}
+
+            connection.init_conn(path=path, db_name='test')
+            for conn in [old_conn] + old_readers:
+                with self.assertRaises(sqlite3.ProgrammingError):
+                    conn.execute('SELECT 1')
+            self.assertEqual(connection._CURSORS, {})
+            self.assertEqual(len(headers._HASH_CACHE), 0)
+            self.assertEqual(
+                connection._READERS.qsize(),
+                connection.NUM_READERS)
+        finally:
+            connection.close_conn()
+            shutil.rmtree(path)
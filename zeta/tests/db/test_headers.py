@@ -1,3 +1,4 @@
+import asyncio
 import sqlite3
 import unittest
 from unittest import mock
@@ -8,10 +9,14 @@ from zeta.db import checkpoint, connection, headers
 class TestHeaders(unittest.TestCase):
 
     def setUp(self):
-        c = sqlite3.connect(':memory:')
-        c.row_factory = sqlite3.Row
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        # NB: lookups and writes run on worker threads
+        c = sqlite3.connect(':memory:', check_same_thread=False)
         connection.CONN = c
         connection.ensure_tables()
+        headers.clear_cache()
 
         self.test_header = {
             'hash': '00000000000000000029f5e855578d7a81f4501f38093c46cb88a47664bf3c0e',  # noqa: E501
@@ -32,14 +37,19 @@ class TestHeaders(unittest.TestCase):
         self.block_501 = '01000000db773c8f3b90efa51d8e40291406897062c164dff617d2a7bf64f64f00000000774328ddff50701ade3a2e1f28711643a17ad5f53f1e94639b04234fa0a5bbcf575b6e49ffff001d7232e103'  # noqa: E501
         self.block_502 = '01000000f9980503946685d96c93e577fbc9178bf36afda513d16ca79272884600000000a2211eb4bc799c5a8f144bf04cae15842c7981ceab73ab53df166eaec53b6d99275d6e49ffff001d1f75f325'  # noqa: E501
 
-        self.assertTrue(headers.store_header(self.test_header))
+        self.assertTrue(self._run(headers.store_header(self.test_header)))
 
     def tearDown(self):
         connection.CONN.close()
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
 
     def test_header_from_row(self):
         self.assertEqual(
-            headers.header_from_row(self.test_header),
+            headers.header_from_row(
+                headers._header_to_row(self.test_header)),
             self.test_header)
 
     def test_check_work(self):
@@ -79,30 +89,72 @@ class TestHeaders(unittest.TestCase):
             headers.parse_header('33')
         self.assertIn('Invalid header received', str(context.exception))
 
+    def test_parse_header_stream(self):
+        checkpoints = checkpoint.CHECKPOINTS['bitcoin_test']
+        self.assertEqual(
+            headers.parse_header_stream(
+                ''.join(header['hex'] for header in checkpoints)),
+            checkpoints)
+        with self.assertRaises(ValueError) as context:
+            headers.parse_header_stream(checkpoints[0]['hex'] + '33')
+        self.assertIn('Invalid header stream', str(context.exception))
+
     def test_batch_store_header(self):
-        self.assertTrue(headers.batch_store_header(
-            checkpoint.CHECKPOINTS['bitcoin_test']))
+        self.assertTrue(self._run(headers.batch_store_header(
+            checkpoint.CHECKPOINTS['bitcoin_test'])))
 
     @mock.patch('zeta.db.headers.check_work')
     def test_batch_store_header_failure(self, mock_check):
         mock_check.return_value = True
-        self.assertFalse(headers.batch_store_header(
-            [{'prev_block': '00', 'hash': '00'}]))
+        self.assertFalse(self._run(headers.batch_store_header(
+            [{'prev_block': '00', 'hash': '00'}])))
+
+    @mock.patch('zeta.db.headers._find_heights_and_work')
+    def test_batch_store_header_lookup_failure(self, mock_find):
+        mock_find.side_effect = sqlite3.OperationalError()
+        self.assertFalse(self._run(headers.batch_store_header(
+            [self.block_501, self.block_502])))
+
+    def test_batch_store_header_parent_in_batch(self):
+        # NB: 501 is known but its parent isn't
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+        self.assertTrue(self._run(headers.store_header(self.block_501)))
+        connection.CONN.execute(
+            'DELETE FROM headers WHERE hash = ?', (self.parsed_500['hash'],))
+        connection.commit()
+        headers.clear_cache()
+
+        self.assertTrue(self._run(headers.batch_store_header(
+            [self.block_501, self.block_502])))
+        heaviest = self._run(headers.find_heaviest())[0]
+        self.assertEqual(heaviest['hex'], self.block_502)
+        self.assertEqual(heaviest['height'], 502)
+
+    @mock.patch('zeta.db.headers.MAX_SQL_PARAMS', 1)
+    def test_find_heights_and_work_chunks(self):
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+        self.assertEqual(
+            headers._find_heights_and_work([
+                self.parsed_500['hash'],
+                self.test_header['hash'],
+                'ff' * 32]),
+            {self.parsed_500['hash']: (500, 0),
+             self.test_header['hash']: (552955, 0)})
 
     @mock.patch('zeta.db.headers.parse_header')
     def test_batch_store_header_parse_string(self, mock_parse):
         mock_parse.return_value = self.test_header
-        self.assertTrue(headers.batch_store_header(['']))
+        self.assertTrue(self._run(headers.batch_store_header([''])))
 
     def test_batch_store_header_parent_finding(self):
         # set this block as base for the chain
-        self.assertTrue(headers.store_header(self.parsed_500))
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
 
         # add a couple children
-        self.assertTrue(headers.batch_store_header(
-            [self.block_501, self.block_502]))
+        self.assertTrue(self._run(headers.batch_store_header(
+            [self.block_501, self.block_502])))
 
-        heaviest = headers.find_heaviest()[0]
+        heaviest = self._run(headers.find_heaviest())[0]
         self.assertEqual(
             heaviest['hex'],
             self.block_502)
@@ -110,9 +162,20 @@ class TestHeaders(unittest.TestCase):
             heaviest['height'],
             502)
 
+    def test_batch_store_header_anchor_work(self):
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+
+        # the unconnected header's difficulty must not leak into the anchor
+        self.assertTrue(self._run(headers.batch_store_header(
+            [self.test_header.copy(), self.block_501, self.block_502])))
+
+        heaviest = self._run(headers.find_heaviest())[0]
+        self.assertEqual(heaviest['height'], 502)
+        self.assertEqual(heaviest['accumulated_work'], 2)
+
     def test_parent_height_and_work(self):
         # set this block as base for the chain
-        self.assertTrue(headers.store_header(self.parsed_500))
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
         parsed_501 = headers.parse_header(self.block_501)
         self.assertEqual(
             headers.parent_height_and_work(parsed_501),
@@ -122,66 +185,100 @@ class TestHeaders(unittest.TestCase):
             (0, 0))
 
     def test_store_header(self):
-        self.assertTrue(headers.store_header(self.parsed_500))
-        self.assertTrue(headers.store_header(self.block_501))
-        self.assertTrue(headers.store_header(self.block_502))
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+        self.assertTrue(self._run(headers.store_header(self.block_501)))
+        self.assertTrue(self._run(headers.store_header(self.block_502)))
 
     @mock.patch('zeta.db.headers.check_work')
     def test_store_header_work_fail(self, mock_check):
         mock_check.return_value = False
-        self.assertFalse(headers.store_header(self.block_501))
+        self.assertFalse(self._run(headers.store_header(self.block_501)))
 
     def test_store_header_parent_height_0(self):
         bad_500 = self.parsed_500.copy()
         bad_500['height'] = 0
-        self.assertTrue(headers.store_header(bad_500))
-        self.assertTrue(headers.store_header(self.block_501))
+        self.assertTrue(self._run(headers.store_header(bad_500)))
+        self.assertTrue(self._run(headers.store_header(self.block_501)))
 
-    @mock.patch('zeta.db.headers.connection.get_cursor')
-    def test_store_header_general_failure(self, mock_get_cursor):
-        mock_get_cursor.return_value.execute.side_effect = ValueError()
-        self.assertFalse(headers.store_header(self.parsed_500))
+    @mock.patch('zeta.db.headers.connection.write_cursor')
+    def test_store_header_general_failure(self, mock_write_cursor):
+        c = mock_write_cursor.return_value.__enter__.return_value
+        c.execute.side_effect = ValueError()
+        self.assertFalse(self._run(headers.store_header(self.parsed_500)))
 
     def test_find_by_height(self):
-        self.assertEqual(headers.find_by_height(500), [])
-        self.assertTrue(headers.store_header(self.parsed_500))
-        self.assertEqual(headers.find_by_height(500), [self.parsed_500])
+        self.assertEqual(self._run(headers.find_by_height(500)), [])
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+        self.assertEqual(self._run(headers.find_by_height(500)), [self.parsed_500])
 
     def test_find_by_hash(self):
-        self.assertIsNone(headers.find_by_hash(self.parsed_500['hash']))
-        self.assertTrue(headers.store_header(self.parsed_500))
+        self.assertIsNone(self._run(headers.find_by_hash(self.parsed_500['hash'])))
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+        self.assertEqual(
+            self._run(headers.find_by_hash(self.parsed_500['hash'])),
+            self.parsed_500)
+
+    def test_find_by_hash_cache(self):
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
         self.assertEqual(
-            headers.find_by_hash(self.parsed_500['hash']),
+            self._run(headers.find_by_hash(self.parsed_500['hash'])),
             self.parsed_500)
+        self.assertIn(self.parsed_500['hash'], headers._HASH_CACHE)
+
+        # callers can't change the cached entry
+        self._run(headers.find_by_hash(self.parsed_500['hash']))['height'] = 7
+        self.assertEqual(
+            self._run(headers.find_by_hash(self.parsed_500['hash']))['height'],
+            500)
+
+        # writes evict the entry
+        moved = self.parsed_500.copy()
+        moved['height'] = 600
+        self.assertTrue(self._run(headers.store_header(moved)))
+        self.assertNotIn(self.parsed_500['hash'], headers._HASH_CACHE)
+        self.assertEqual(
+            self._run(headers.find_by_hash(self.parsed_500['hash']))['height'],
+            600)
 
     @mock.patch('zeta.db.headers.check_work')
     def test_find_highest(self, mock_check):
         mock_check.return_value = True
 
-        self.assertEqual(headers.find_highest(), [self.test_header])
+        self.assertEqual(self._run(headers.find_highest()), [self.test_header])
 
         same_height = self.test_header.copy()
         same_height['hash'] = '33' * 32
-        self.assertTrue(headers.store_header(same_height))
+        self.assertTrue(self._run(headers.store_header(same_height)))
         self.assertEqual(
-            headers.find_highest(),
+            self._run(headers.find_highest()),
             [self.test_header, same_height])
 
         higher = self.test_header.copy()
         higher['height'] = 300000000
-        self.assertTrue(headers.store_header(higher))
-        self.assertEqual(headers.find_highest(), [higher])
+        self.assertTrue(self._run(headers.store_header(higher)))
+        self.assertEqual(self._run(headers.find_highest()), [higher])
+
+    def test_find_heaviest_summary(self):
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
+        self.assertTrue(self._run(headers.store_header(self.block_501)))
+        heaviest = self._run(headers.find_heaviest())[0]
+        self.assertEqual(
+            self._run(headers.find_heaviest_summary()),
+            (heaviest['hash'], 501, heaviest['accumulated_work']))
+
+        connection.CONN.execute('DELETE FROM headers')
+        self.assertIsNone(self._run(headers.find_heaviest_summary()))
 
     def test_find_heaviest(self):
-        self.assertTrue(headers.store_header(self.parsed_500))
+        self.assertTrue(self._run(headers.store_header(self.parsed_500)))
         self.assertEqual(
-            headers.find_heaviest(),
+            self._run(headers.find_heaviest()),
             [self.test_header, self.parsed_500])
-        self.assertTrue(headers.store_header(self.block_501))
+        self.assertTrue(self._run(headers.store_header(self.block_501)))
         self.assertEqual(
-            headers.find_heaviest()[0]['hex'],
+            self._run(headers.find_heaviest())[0]['hex'],
             self.block_501)
-        self.assertTrue(headers.store_header(self.block_502))
+        self.assertTrue(self._run(headers.store_header(self.block_502)))
         self.assertEqual(
-            headers.find_heaviest()[0]['hex'],
+            self._run(headers.find_heaviest())[0]['hex'],
             self.block_502)
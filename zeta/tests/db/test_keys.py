@@ -10,7 +10,6 @@ class TestKeys(unittest.TestCase):
 
     def setUp(self):
         c = sqlite3.connect(':memory:')
-        c.row_factory = sqlite3.Row
         connection.CONN = c
         connection.ensure_tables()
 
@@ -11,7 +11,6 @@ class TestPrevouts(unittest.TestCase):
     def setUp(self):
         # Replace the connection with an in-memory DB to avoid pollution
         c = sqlite3.connect(':memory:')
-        c.row_factory = sqlite3.Row
         connection.CONN = c
         connection.ensure_tables()
 
@@ -85,6 +84,12 @@ class TestPrevouts(unittest.TestCase):
             prevouts._flatten_prevout(self.prevout),
             self.prevout_as_row)
 
+    def test_prevout_to_row(self):
+        row = prevouts._prevout_to_row(self.prevout_as_row)
+        self.assertEqual(len(row), 7)
+        self.assertEqual(row[0], self.prevout_as_row['outpoint'])
+        self.assertEqual(row[-1], self.prevout_as_row['address'])
+
     def test_find_by_address(self):
         self.assertEqual(
             prevouts.find_by_address(self.prevout['address']),
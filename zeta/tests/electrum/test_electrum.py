@@ -64,8 +64,8 @@ class TestElectrum(unittest.TestCase):
     @mock.patch('zeta.electrum.electrum._get_client')
     def test_get_tx(self, mock_get):
         client = mock.MagicMock()
-        client.RPC.return_value = \
-            do_nothing('010000000001011746bd867400f3494b8f44c24b83e1aa58c4f0ff25b4a61cffeffd4bc0f9ba300000000000ffffffff024897070000000000220020a4333e5612ab1a1043b25755c89b16d55184a42f81799e623e6bc39db8539c180000000000000000166a14edb1b5c2f39af0fec151732585b1049b07895211024730440220276e0ec78028582054d86614c65bc4bf85ff5710b9d3a248ca28dd311eb2fa6802202ec950dd2a8c9435ff2d400cc45d7a4854ae085f49e05cc3f503834546d410de012103732783eef3af7e04d3af444430a629b16a9261e4025f52bf4d6d026299c37c7400000000')  # noqa: E501
+        client.batch_RPC.return_value = \
+            do_nothing(['010000000001011746bd867400f3494b8f44c24b83e1aa58c4f0ff25b4a61cffeffd4bc0f9ba300000000000ffffffff024897070000000000220020a4333e5612ab1a1043b25755c89b16d55184a42f81799e623e6bc39db8539c180000000000000000166a14edb1b5c2f39af0fec151732585b1049b07895211024730440220276e0ec78028582054d86614c65bc4bf85ff5710b9d3a248ca28dd311eb2fa6802202ec950dd2a8c9435ff2d400cc45d7a4854ae085f49e05cc3f503834546d410de012103732783eef3af7e04d3af444430a629b16a9261e4025f52bf4d6d026299c37c7400000000'])  # noqa: E501
 
         mock_get.return_value = do_nothing(client)
 
@@ -77,7 +77,7 @@ class TestElectrum(unittest.TestCase):
 
             # NB: to test the None case we have to make new awaitables
             mock_get.return_value = do_nothing(client)
-            client.RPC.return_value = do_nothing(None)
+            client.batch_RPC.return_value = do_nothing([None])
             self.assertIsNone(await electrum.get_tx('00' * 32))
 
         self.loop.run_until_complete(_test())
@@ -178,11 +178,37 @@ class TestElectrum(unittest.TestCase):
 
         self.loop.run_until_complete(_test())
 
+    @mock.patch('zeta.electrum.electrum._get_client')
+    def test_subscribe_to_addresses_error(self, mock_get):
+        client = mock.MagicMock()
+        sub_q = asyncio.Queue()
+
+        async def fail():
+            raise RuntimeError('no subscription')
+
+        client.subscribe.side_effect = [
+            (fail(), sub_q),
+            (do_nothing(6), sub_q)]
+        mock_get.return_value = do_nothing(client)
+
+        async def _test():
+            q = asyncio.Queue()
+            with self.assertRaises(RuntimeError):
+                await electrum.subscribe_to_addresses(
+                    ['bc1qmqyekxnf4xhxffv5fnlu387sggkhd5pw2w7g5tvtmjuar6ev6d6sld5pfl',  # noqa: E501
+                     'bc1qmqyekxnf4xhxffv5fnlu387sggkhd5pw2w7g5tvtmjuar6ev6d6sld5pfl'],  # noqa: E501
+                    outq=q)
+
+            # the other subscription still went through
+            self.assertEqual(await q.get(), 6)
+
+        self.loop.run_until_complete(_test())
+
     @mock.patch('zeta.electrum.electrum._get_client')
     def test_get_unspents(self, mock_get):
         client = mock.MagicMock()
-        client.RPC.return_value = \
-            do_nothing('77')  # noqa: E501
+        client.batch_RPC.return_value = \
+            do_nothing(['77'])  # noqa: E501
 
         mock_get.return_value = do_nothing(client)
 
@@ -201,8 +227,8 @@ class TestElectrum(unittest.TestCase):
     @mock.patch('zeta.electrum.electrum._get_client')
     def test_get_history(self, mock_get):
         client = mock.MagicMock()
-        client.RPC.return_value = \
-            do_nothing('77')  # noqa: E501
+        client.batch_RPC.return_value = \
+            do_nothing(['77'])  # noqa: E501
 
         mock_get.return_value = do_nothing(client)
 
@@ -216,6 +242,48 @@ class TestElectrum(unittest.TestCase):
             mock_get.return_value = do_nothing(client)
             self.assertEqual(await electrum.get_history('00' * 32), [])
 
+            # NB: no response is None, not an empty history
+            mock_get.return_value = do_nothing(client)
+            client.batch_RPC.return_value = do_nothing(None)
+            self.assertIsNone(await electrum.get_history('bc1qmqyekxnf4xhxffv5fnlu387sggkhd5pw2w7g5tvtmjuar6ev6d6sld5pfl'))  # noqa: E501
+
+        self.loop.run_until_complete(_test())
+
+    @mock.patch('zeta.electrum.electrum._get_client')
+    def test_get_txs(self, mock_get):
+        client = mock.MagicMock()
+        client.batch_RPC.return_value = do_nothing(None)
+        mock_get.return_value = do_nothing(client)
+
+        async def _test():
+            self.assertEqual(await electrum.get_txs([]), [])
+            # NB: no response at all means no txns
+            self.assertEqual(
+                await electrum.get_txs(['00' * 32, '11' * 32]),
+                [None, None])
+            client.batch_RPC.assert_called_once_with(
+                'blockchain.transaction.get',
+                [('00' * 32,), ('11' * 32,)])
+
+        self.loop.run_until_complete(_test())
+
+    @mock.patch('zeta.electrum.electrum._get_client')
+    def test_get_unspents_many(self, mock_get):
+        client = mock.MagicMock()
+        client.batch_RPC.return_value = do_nothing(['77', '88'])
+        mock_get.return_value = do_nothing(client)
+
+        async def _test():
+            # NB: bad addresses are skipped, not sent
+            res = await electrum.get_unspents_many([
+                'bc1qmqyekxnf4xhxffv5fnlu387sggkhd5pw2w7g5tvtmjuar6ev6d6sld5pfl',  # noqa: E501
+                '00' * 32,
+                '1GniSeeH9Ui1ZK4eyoaopNP1TnQLEgQiFW'])
+            self.assertEqual(res, ['77', [], '88'])
+            self.assertEqual(
+                len(client.batch_RPC.call_args[0][1]),
+                2)
+
         self.loop.run_until_complete(_test())
 
 
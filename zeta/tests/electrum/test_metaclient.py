@@ -1,8 +1,10 @@
 import asyncio
 import unittest
-# from unittest import mock
+from unittest import mock
 from contextlib import suppress
 
+from connectrum import ElectrumErrorResponse
+
 from zeta.electrum import metaclient
 
 
@@ -36,3 +38,46 @@ class TestElectrum(unittest.TestCase):
         self.assertEqual(m._num_clients, 2)
         self.assertEqual(m._random_set_size, 2)
         self.assertEqual(m._timeout_seconds, 5)
+
+    def test_batch_RPC(self):
+        batching = mock.MagicMock()
+        batching.batch_rpc.return_value = do_nothing([1, 2])
+
+        # NB: no batch_rpc on old connectrum clients
+        pipelining = mock.MagicMock(spec=['RPC'])
+        pipelining.RPC.side_effect = lambda method, n: do_nothing(n)
+
+        m = metaclient.MetaClient()
+        m._random_set_size = 1
+
+        async def _test():
+            m._clients = [batching]
+            self.assertEqual(
+                await m.batch_RPC('a.b', [(1,), (2,)]),
+                [1, 2])
+            batching.batch_rpc.assert_called_once_with(
+                [('a.b', 1), ('a.b', 2)])
+
+            m._clients = [pipelining]
+            self.assertEqual(
+                await m.batch_RPC('a.b', [(1,), (2,)]),
+                [1, 2])
+
+            # NB: one errored entry fails a batch. it's redone one by one
+            async def fail(requests):
+                raise ElectrumErrorResponse('bad', requests)
+
+            async def rpc(method, n):
+                if n == 1:
+                    raise ElectrumErrorResponse('bad', n)
+                return n
+
+            erroring = mock.MagicMock()
+            erroring.batch_rpc.side_effect = fail
+            erroring.RPC.side_effect = rpc
+            m._clients = [erroring]
+            self.assertEqual(
+                await m.batch_RPC('a.b', [(1,), (2,)]),
+                [None, 2])
+
+        self.loop.run_until_complete(_test())
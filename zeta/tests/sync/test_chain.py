@@ -1,4 +1,8 @@
+import asyncio
 import unittest
+from unittest import mock
+
+from zeta.sync import chain
 
 
 class TestChain(unittest.TestCase):
@@ -11,3 +15,35 @@ class TestChain(unittest.TestCase):
 
     def test_initial_setup(self):
         ...
+
+    @mock.patch('zeta.sync.chain._process_header_batch')
+    @mock.patch('zeta.sync.chain.electrum')
+    def test_catch_up(self, mock_electrum, mock_process):
+        loop = asyncio.new_event_loop()
+        calls = []
+
+        async def get_headers(height, count):
+            calls.append(('get', height))
+            return {'count': 2016 if height == 0 else 3, 'hex': height}
+
+        async def process(electrum_hex):
+            await asyncio.sleep(0)
+            calls.append(('process', electrum_hex))
+
+        mock_electrum.get_headers.side_effect = get_headers
+        mock_process.side_effect = process
+
+        async def _test():
+            await chain._catch_up(0)
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+
+        # NB: each batch is stored before the next is requested
+        self.assertEqual(
+            calls,
+            [('get', 0), ('process', 0), ('get', 2014), ('process', 2014)])
@@ -15,6 +15,13 @@ class TestCrypto(unittest.TestCase):
         self.assertFalse(crypto.is_pubkey('this is not hex'))
         self.assertFalse(crypto.is_pubkey('0250863ad64a87ae8a2fe83c1af1a8403cb53f53e486d8511dad8a04887e5b235250863ad64a87ae8a2fe83c1af1a8403cb53f53e486d8511dad8a04887e5b2352'))  # noqa: E501    ...
 
+    def test_hash256(self):
+        # the genesis block header hash
+        genesis = bytes.fromhex('0100000000000000000000000000000000000000000000000000000000000000000000003ba3edfd7a7b12b27ac72c3e67768f617fc81bc3888a51323a9fb8aa4b1e5e4a29ab5f49ffff001d1dac2b7c')  # noqa: E501
+        self.assertEqual(
+            crypto.hash256(genesis)[::-1].hex(),
+            '000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f')  # noqa: E501
+
     def test_coerce_key(self):
         crypto.coerce_key('38' * 32)
         crypto.coerce_key(b'\x38' * 32)
@@ -7,6 +7,19 @@ def reverse_hex(h: str):
     return bytes.fromhex(h)[::-1].hex()
 
 
+async def run_in_thread(f: Callable[..., Any], *args: Any) -> Any:
+    '''
+    Runs a blocking function on the event loop's default executor
+    Lets other tasks run while it works
+
+    Args:
+        f (function): the function to run
+        args: its positional args
+    '''
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, f, *args)
+
+
 async def queue_printer(
         q: asyncio.Queue,
         transform: Optional[Callable[[Any], Any]] = None) -> None:  # pragma: nocover  # noqa: E501
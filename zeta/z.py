@@ -15,21 +15,17 @@ async def _status_updater() -> None:
     '''
     best = None
     while True:
-        heaviest = headers.find_heaviest()
+        heaviest = await headers.find_heaviest_summary()
 
         # it'd be very strange if this failed
         # but I put in the check, which implies that it happened in testing
-        if len(heaviest) != 0:
-            if best and heaviest[0]['height'] > best['height']:
+        if heaviest is not None:
+            if best and heaviest[1] > best[1]:
                 print('chain tip advanced {} blocks'.format(
-                    heaviest[0]['height'] - best['height']
+                    heaviest[1] - best[1]
                 ))
-            best = heaviest[0]
-            print('Best Block: {} at {} with {} work'.format(
-                best['hash'],
-                best['height'],
-                best['accumulated_work']
-            ))
+            best = heaviest
+            print('Best Block: {} at {} with {} work'.format(*best))
         await asyncio.sleep(15)
 
 